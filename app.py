@@ -12,6 +12,12 @@ import time
 import yaml
 import os
 from utils import fetch_irdai_data, fetch_claim_settlement_data, scrape_premium_data, fetch_terms_and_conditions
+from premium import build_premium_table, estimate_premiums, lookup_estimate, format_premium_estimate
+from insurers import build_insurer_index, resolve_insurer, merge_live_data
+from prompts import (
+    RECOMMENDATION_SYSTEM_PROMPT, COMPARISON_SYSTEM_PROMPT, QUESTION_SYSTEM_PROMPT,
+    flatten_catalog, build_recommendation_prompt, build_comparison_prompt, estimate_tokens
+)
 
 # Configure page
 st.set_page_config(
@@ -47,6 +53,9 @@ if "latest_irdai_data" not in st.session_state:
 if "claim_settlement_data" not in st.session_state:
     st.session_state.claim_settlement_data = []
 
+if "premium_data" not in st.session_state:
+    st.session_state.premium_data = []
+
 if "last_update" not in st.session_state:
     st.session_state.last_update = None
 
@@ -67,13 +76,33 @@ def load_insurance_database():
 # Load the insurance database
 INSURANCE_DATABASE = load_insurance_database()
 
+# Parse the catalog's premium and coverage ranges once for local premium estimation
+PREMIUM_TABLE = build_premium_table(INSURANCE_DATABASE)
+
+# Index of catalog insurer names for resolving the spellings used by other sources
+INSURER_INDEX = build_insurer_index([company["name"] for company in INSURANCE_DATABASE])
+
+# Catalog with the latest scraped figures merged in, shared by all tabs
+if "insurance_catalog" not in st.session_state:
+    st.session_state.insurance_catalog = INSURANCE_DATABASE
+
+
+# Function to merge the latest scraped data into the session's catalog
+def refresh_insurance_catalog():
+    st.session_state.insurance_catalog = merge_live_data(
+        INSURANCE_DATABASE,
+        INSURER_INDEX,
+        claim_data=st.session_state.claim_settlement_data,
+        premium_data=st.session_state.premium_data
+    )
+
 
 # Function to create Gemini model
-def get_gemini_model():
+def get_gemini_model(system_instruction=None):
     """Create and return a Gemini model instance."""
     try:
         # Using gemini-2.0-flash model for better performance
-        model = genai.GenerativeModel('gemini-2.0-flash')
+        model = genai.GenerativeModel('gemini-2.0-flash', system_instruction=system_instruction)
         return model
     except Exception as e:
         st.error(f"Error initializing Gemini model: {str(e)}")
@@ -104,6 +133,14 @@ def generate_with_backoff(model, prompt, max_retries=3):
     return FallbackResponse()
 
 
+# Function to log estimated and actual token usage of a Gemini call
+def log_token_usage(call_name, estimated_tokens, response, trimmed=None):
+    usage = getattr(response, "usage_metadata", None)
+    actual = f", actual prompt {usage.prompt_token_count}, output {usage.candidates_token_count}" if usage else ""
+    trimmed = f", trimmed {trimmed} to fit budget" if trimmed else ""
+    print(f"{call_name}: estimated prompt {estimated_tokens} tokens{actual}{trimmed}")
+
+
 # Function to run data update jobs in the background
 def start_background_jobs():
     def run_scheduled_jobs():
@@ -123,52 +160,18 @@ def start_background_jobs():
 # Function to get personalized insurance recommendations using Gemini
 def get_insurance_recommendations(user_profile, insurance_database):
     try:
-        model = get_gemini_model()
+        model = get_gemini_model(RECOMMENDATION_SYSTEM_PROMPT)
         if not model:
             return []
 
-        # Convert user profile to a readable format
-        profile_str = "\n".join([f"{k}: {v}" for k, v in user_profile.items() if v])
-        
-        # Convert insurance database to a readable format
-        insurance_str = yaml.dump(insurance_database)
-        
-        # Create prompt for the AI model
-        prompt = f"""
-        As a health insurance advisor, recommend the best health insurance policies based on the following user profile:
-        
-        USER PROFILE:
-        {profile_str}
-        
-        AVAILABLE INSURANCE POLICIES:
-        {insurance_str}
-        
-        Please recommend the top 3 most suitable insurance policies for this user. For each recommendation, provide:
-        1. Insurance company name
-        2. Policy name
-        3. Why this is suitable for the user
-        4. Key benefits
-        5. Any limitations or considerations
-        6. Approximate premium estimate based on the user profile
-        
-        Format your response as a structured JSON with these fields:
-        {{
-            "recommendations": [
-                {{
-                    "rank": 1,
-                    "company": "Company name",
-                    "policy": "Policy name", 
-                    "suitability_reason": "Why this is suitable",
-                    "key_benefits": ["benefit1", "benefit2", "benefit3"],
-                    "limitations": ["limitation1", "limitation2"],
-                    "premium_estimate": "Estimated premium range"
-                }},
-                // more recommendations...
-            ]
-        }}
-        """
+        # Premiums are estimated locally so the model only has to rank, not do arithmetic
+        estimates = estimate_premiums(PREMIUM_TABLE, user_profile)
+
+        # Serialize the catalog as a compact table, trimming the least suitable policies to fit the budget
+        prompt, prompt_tokens, dropped_rows = build_recommendation_prompt(user_profile, insurance_database, estimates)
         
         response = generate_with_backoff(model, prompt)
+        log_token_usage("Recommendations", prompt_tokens, response, dropped_rows and f"{dropped_rows} policies")
         
         # Parse and return the recommendations
         response_text = response.text
@@ -179,8 +182,12 @@ def get_insurance_recommendations(user_profile, insurance_database):
         
         if json_match:
             json_str = json_match.group(0)
-            recommendations = json.loads(json_str)
-            return recommendations.get("recommendations", [])
+            recommendations = json.loads(json_str).get("recommendations", [])
+            for rec in recommendations:
+                rec["company"] = resolve_insurer(INSURER_INDEX, rec.get("company")) or rec.get("company")
+                estimate = lookup_estimate(estimates, rec.get("company"), rec.get("policy"))
+                rec["premium_estimate"] = format_premium_estimate(estimate)
+            return recommendations
         
         return []
     except Exception as e:
@@ -189,46 +196,24 @@ def get_insurance_recommendations(user_profile, insurance_database):
 
 
 # Function to compare insurance policies
-def compare_insurance_policies(policies, insurance_database):
+def compare_insurance_policies(policies, insurance_database, estimates=None):
     try:
-        model = get_gemini_model()
+        model = get_gemini_model(COMPARISON_SYSTEM_PROMPT)
         if not model:
             return ""
 
-        # Extract policy details from database
-        policy_details = []
-        for policy_name in policies:
-            for company in insurance_database:
-                for policy in company.get("policies", []):
-                    if policy["name"] == policy_name:
-                        policy_details.append({
-                            "company": company["name"],
-                            "policy": policy["name"],
-                            "details": policy
-                        })
-
-        if not policy_details:
+        # Extract policy details from database by (company, policy), in the order they were selected
+        catalog_rows = {(row["company"], row["policy"]): row for row in flatten_catalog(insurance_database)}
+        policy_rows = [catalog_rows[pair] for pair in policies if pair in catalog_rows]
+
+        if not policy_rows:
             return "No policy details found for comparison."
 
         # Create prompt for the AI model
-        policies_str = yaml.dump(policy_details)
-        prompt = f"""
-        Compare the following health insurance policies objectively:
-        
-        {policies_str}
-        
-        Please provide a detailed comparison including:
-        1. Premium cost comparison
-        2. Coverage benefits comparison
-        3. Waiting periods comparison
-        4. Special features comparison
-        5. Pros and cons of each policy
-        6. Which policy might be better for different types of users
-        
-        Format your response in a clear, structured way with headings and bullet points.
-        """
+        prompt, prompt_tokens, dropped_columns = build_comparison_prompt(policy_rows, estimates)
         
         response = generate_with_backoff(model, prompt)
+        log_token_usage("Comparison", prompt_tokens, response, ", ".join(dropped_columns))
         return response.text
     except Exception as e:
         st.error(f"Error comparing insurance policies: {str(e)}")
@@ -238,21 +223,15 @@ def compare_insurance_policies(policies, insurance_database):
 # Function to answer health insurance related questions
 def answer_insurance_question(question):
     try:
-        model = get_gemini_model()
+        model = get_gemini_model(QUESTION_SYSTEM_PROMPT)
         if not model:
             return "Sorry, I'm unable to answer your question at the moment."
 
-        # Create a prompt with context about the question being insurance-related
-        prompt = f"""
-        As a health insurance expert, please answer the following question about health insurance:
-        
-        Question: {question}
-        
-        Provide a detailed, accurate, and helpful answer based on your knowledge of health insurance in India.
-        Include relevant facts, regulations, and practical advice where appropriate.
-        """
+        # The expert instructions live in the system prompt, so only the question is sent
+        prompt = f"Question: {question}"
         
         response = generate_with_backoff(model, prompt)
+        log_token_usage("Question", estimate_tokens(prompt), response)
         return response.text
     except Exception as e:
         st.error(f"Error answering question: {str(e)}")
@@ -317,7 +296,7 @@ def main():
             
             # Get recommendations based on updated profile
             with st.spinner("Getting personalized recommendations..."):
-                recommendations = get_insurance_recommendations(st.session_state.user_profile, INSURANCE_DATABASE)
+                recommendations = get_insurance_recommendations(st.session_state.user_profile, st.session_state.insurance_catalog)
                 st.session_state.insurance_recommendations = recommendations
     
     # Main content area with tabs
@@ -354,7 +333,7 @@ def main():
                     st.write(rec.get("premium_estimate", "Premium estimate not available"))
                     
                     # Find more details in the database
-                    for company in INSURANCE_DATABASE:
+                    for company in st.session_state.insurance_catalog:
                         if company["name"] == rec.get("company"):
                             for policy in company["policies"]:
                                 if policy["name"] == rec.get("policy"):
@@ -368,19 +347,20 @@ def main():
     # Insurance Policies Tab
     with tabs[1]:
         st.header("All Available Insurance Policies")
+        catalog = st.session_state.insurance_catalog
         
         # Allow filtering
         col1, col2 = st.columns(2)
         with col1:
             filter_company = st.multiselect(
                 "Filter by Insurance Company",
-                options=[company["name"] for company in INSURANCE_DATABASE],
+                options=[company["name"] for company in catalog],
                 default=[]
             )
         
         with col2:
             coverage_options = []
-            for company in INSURANCE_DATABASE:
+            for company in catalog:
                 for policy in company.get("policies", []):
                     if "coverage_range" in policy:
                         coverage_options.append(policy["coverage_range"])
@@ -392,9 +372,9 @@ def main():
             )
         
         # Display filtered policies
-        filtered_companies = INSURANCE_DATABASE
+        filtered_companies = catalog
         if filter_company:
-            filtered_companies = [company for company in INSURANCE_DATABASE if company["name"] in filter_company]
+            filtered_companies = [company for company in catalog if company["name"] in filter_company]
         
         for company in filtered_companies:
             st.subheader(company["name"])
@@ -443,6 +423,7 @@ def main():
                 with st.spinner("Fetching latest claim settlement data..."):
                     claim_data = fetch_claim_settlement_data()
                     st.session_state.claim_settlement_data = claim_data
+                    refresh_insurance_catalog()
                     st.success("Claim settlement data updated!")
             
             if st.session_state.claim_settlement_data:
@@ -451,6 +432,19 @@ def main():
                 st.dataframe(claim_df)
             else:
                 st.info("Click 'Refresh Claim Settlement Data' to fetch the latest claim settlement ratios.")
+
+            st.subheader("Insurer Premiums")
+            if st.button("Refresh Insurer Premium Data"):
+                with st.spinner("Fetching latest premiums from insurer websites..."):
+                    st.session_state.premium_data = scrape_premium_data()
+                    refresh_insurance_catalog()
+                    st.success("Premium data updated!")
+
+            if st.session_state.premium_data:
+                premium_df = pd.DataFrame(st.session_state.premium_data)
+                st.dataframe(premium_df[["company", "policy_name", "premium", "coverage", "last_updated"]])
+            else:
+                st.info("Click 'Refresh Insurer Premium Data' to fetch the latest premiums from insurer websites.")
     
     # Policy Comparison Tab
     with tabs[3]:
@@ -458,7 +452,7 @@ def main():
         
         # Get all policies for selection
         all_policies = []
-        for company in INSURANCE_DATABASE:
+        for company in st.session_state.insurance_catalog:
             for policy in company.get("policies", []):
                 all_policies.append(f"{company['name']} - {policy['name']}")
         
@@ -470,11 +464,23 @@ def main():
         )
         
         if len(selected_policies) >= 2:
+            # Local premium estimates for the selected policies, available without an LLM call
+            estimates = None
+            if st.session_state.user_profile["age"]:
+                estimates = estimate_premiums(PREMIUM_TABLE, st.session_state.user_profile)
+                selected_estimates = estimates[
+                    (estimates["company"] + " - " + estimates["policy"]).isin(selected_policies)
+                ]
+                st.subheader("Estimated Premiums for Your Profile")
+                st.dataframe(selected_estimates[["company", "policy", "annual_estimate", "monthly_estimate",
+                                                 "coverage_available", "within_premium_range", "within_budget"]])
+
             if st.button("Compare Policies"):
                 with st.spinner("Generating comparison..."):
                     # Extract just the policy names
-                    policy_names = [policy.split(" - ")[1] for policy in selected_policies]
-                    comparison = compare_insurance_policies(policy_names, INSURANCE_DATABASE)
+                    # Split into (company, policy) pairs, since policy names are not unique across companies
+                    policy_pairs = [tuple(policy.split(" - ", 1)) for policy in selected_policies]
+                    comparison = compare_insurance_policies(policy_pairs, st.session_state.insurance_catalog, estimates)
                     st.markdown(comparison)
         else:
             st.info("Please select at least 2 policies to compare.")
@@ -518,7 +524,8 @@ if __name__ == "__main__":
         fetch_irdai_data()
     
     if not st.session_state.claim_settlement_data:
-        fetch_claim_settlement_data()
+        st.session_state.claim_settlement_data = fetch_claim_settlement_data()
+        refresh_insurance_catalog()
     
     # Run main application
     main()
@@ -0,0 +1,102 @@
+import copy
+import re
+
+# Words that vary between sources but never identify an insurer on their own
+NAME_STOPWORDS = {
+    "the", "and", "of", "co", "company", "ltd", "limited", "pvt", "private", "india",
+    "insurance", "health", "general", "allied", "capital", "plans", "plan",
+}
+
+# Known alternative names (normalized) mapped to the normalized catalog name they refer to.
+# Single distinctive words such as "hdfc" or "lombard" are matched by the token index instead.
+INSURER_ALIASES = {
+    "niva bupa": "max bupa",
+    "abhi": "aditya birla",
+    "state bank": "sbi",
+}
+
+
+# Function to reduce an insurer name to a canonical lookup key
+def normalize_insurer_name(name):
+    """Return a lowercase key without punctuation or generic words, e.g. "CARE Health Insurance" -> "care"."""
+    tokens = re.findall(r"[a-z0-9]+", str(name or "").lower())
+    meaningful = [token for token in tokens if token not in NAME_STOPWORDS]
+    return " ".join(meaningful or tokens)
+
+
+# Function to reduce a policy name to a lookup key
+def normalize_policy_name(name):
+    """Return a lowercase key without punctuation; unlike insurer names, no words are dropped."""
+    return " ".join(re.findall(r"[a-z0-9]+", str(name or "").lower()))
+
+
+# Function to precompute an O(1) lookup index from insurer names in any spelling to canonical names
+def build_insurer_index(canonical_names, aliases=None):
+    """Return an index mapping normalized names, aliases and distinctive tokens to canonical names."""
+    keys = {}
+    token_owners = {}
+    name_tokens = {}
+    for name in canonical_names:
+        key = normalize_insurer_name(name)
+        keys[key] = name
+        name_tokens[name] = set(key.split())
+        for token in key.split():
+            token_owners.setdefault(token, set()).add(name)
+
+    for alias, target in (INSURER_ALIASES if aliases is None else aliases).items():
+        if target in keys and alias not in keys:
+            keys[alias] = keys[target]
+
+    # Only tokens that belong to a single insurer can identify it on their own
+    tokens = {token: next(iter(owners)) for token, owners in token_owners.items() if len(owners) == 1}
+
+    return {"keys": keys, "tokens": tokens, "name_tokens": name_tokens}
+
+
+# Function to resolve an insurer name from any source to its canonical name
+def resolve_insurer(index, name):
+    """Return the canonical insurer name, or None if the name is unknown or ambiguous."""
+    key = normalize_insurer_name(name)
+    if key in index["keys"]:
+        return index["keys"][key]
+
+    # A partial name such as "HDFC" resolves only if all of its words belong to that insurer;
+    # any other word ("Tata AIA Life", "HDFC Life") means it may be a different company
+    words = key.split()
+    matches = {index["tokens"][token] for token in words if token in index["tokens"]}
+    if len(matches) == 1:
+        match = matches.pop()
+        if all(token in index["name_tokens"][match] for token in words):
+            return match
+    return None
+
+
+# Function to merge scraped claim settlement, hospital network and premium data into the catalog
+def merge_live_data(insurance_database, insurer_index, claim_data=None, premium_data=None):
+    """Return a copy of the catalog updated with live figures, joined on the resolved insurer."""
+    catalog = copy.deepcopy(insurance_database or [])
+    companies = {company["name"]: company for company in catalog}
+
+    for row in claim_data or []:
+        company = companies.get(resolve_insurer(insurer_index, row.get("company")))
+        if not company:
+            continue
+        if row.get("claim_settlement_ratio"):
+            company["claim_settlement_ratio"] = row["claim_settlement_ratio"]
+        if row.get("network_hospitals"):
+            company["cashless_hospitals"] = row["network_hospitals"]
+        if row.get("premium"):
+            company["starting_premium"] = row["premium"]
+
+    for row in premium_data or []:
+        company = companies.get(resolve_insurer(insurer_index, row.get("company")))
+        if not company:
+            continue
+        policy_name = normalize_policy_name(row.get("policy_name"))
+        for policy in company.get("policies", []):
+            if normalize_policy_name(policy["name"]) == policy_name:
+                policy["live_premium"] = row.get("premium")
+                policy["live_premium_updated"] = row.get("last_updated")
+                break
+
+    return catalog
@@ -0,0 +1,538 @@
+"""Load-testing harness for the Health Insurance Advisor.
+
+Starts app.py in a real Streamlit server process (with local stand-ins for the
+insurer/IRDAI websites and the Gemini API patched in), then drives N concurrent
+simulated users over Streamlit's websocket protocol through the main flows:
+submit profile, browse policies, compare policies and chat.
+
+Reports throughput, tail latency per step, memory per session and the server's
+thread count over time. One warm-up session runs before the memory baseline is
+taken, so one-time imports are not counted as per-session cost. Memory and
+thread sampling read /proc, so they are only available on Linux.
+
+Needs the websockets package on top of the app's requirements.txt; it is a
+load-test-only dependency:
+    pip install websockets
+
+Usage:
+    python loadtest.py --users 20 --iterations 3
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from unittest import mock
+from urllib.parse import urlsplit
+
+import numpy as np
+import requests
+import websockets
+import yaml
+from streamlit.proto.Alert_pb2 import Alert
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(APP_DIR, "app.py")
+
+AGE_INPUT = "Age"
+FAMILY_SIZE_INPUT = "Family Size"
+PROFILE_BUTTON = "Update Profile & Get Recommendations"
+COMPANY_FILTER = "Filter by Insurance Company"
+COMPARE_SELECT = "Select policies to compare (2-3 recommended)"
+COMPARE_BUTTON = "Compare Policies"
+
+CHAT_QUESTIONS = [
+    "What is a waiting period for pre-existing diseases?",
+    "Is a family floater better than individual policies?",
+    "How does the no claim bonus work?",
+    "What does co-payment mean?",
+]
+
+
+# Canned pages served in place of the IRDAI, Ditto and insurer websites
+def _irdai_page():
+    rows = "".join(
+        f"<tr><td>{i}</td><td>Health</td><td>Insurer {i}</td><td>UIN{i}</td><td>Plan {i}</td>"
+        f"<td>2024-01-{i + 1:02d}</td><td>-</td><td><a href='/doc{i}.pdf'>PDF</a></td></tr>"
+        for i in range(20)
+    )
+    return f"<html><body><table>{rows}</table></body></html>"
+
+
+# Insurer spellings as they appear on the comparison sites, deliberately unlike the catalog's
+DITTO_INSURERS = [
+    "Care Health Insurance Ltd.", "Niva Bupa Health Insurance", "Star Health and Allied Insurance",
+    "HDFC ERGO General Insurance", "ICICI Lombard General Insurance", "Tata AIG General Insurance",
+    "Bajaj Allianz General Insurance", "SBI General Insurance", "Aditya Birla Health Insurance",
+    "Go Digit General Insurance",
+]
+
+
+def _ditto_page():
+    rows = "".join(
+        f"<tr><td>{name}</td><td>9{i % 10}.5%</td><td>{5000 + i * 250}+</td><td>₹{8000 + i * 100}</td><td>-</td></tr>"
+        for i, name in enumerate(DITTO_INSURERS)
+    )
+    return f"<html><body><table><tr><th>Company</th></tr>{rows}</table></body></html>"
+
+
+def _insurer_page():
+    cards = "".join(
+        f"<div class='plan-card'><h3>Plan {i}</h3><span class='premium'>₹{9000 + i * 500}</span>"
+        f"<span class='coverage'>₹{5 + i} Lakhs</span><ul><li>Cashless</li><li>No claim bonus</li></ul></div>"
+        for i in range(5)
+    )
+    return f"<html><body>{cards}<div class='terms'>Standard terms apply.</div></body></html>"
+
+
+class StandInSiteHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        if "health-insurance-products" in self.path:
+            body = _irdai_page()
+        elif "companies" in self.path:
+            body = _ditto_page()
+        else:
+            body = _insurer_page()
+
+        payload = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# Local stand-in for google.generativeai.GenerativeModel
+class StandInGeminiModel:
+    latency = 0.0
+    catalog = []
+
+    def __init__(self, model_name, system_instruction=None, **kwargs):
+        self.model_name = model_name
+        self.system_instruction = system_instruction or ""
+
+    def generate_content(self, prompt):
+        time.sleep(self.latency)
+        if "recommend the top 3" in f"{self.system_instruction}\n{prompt}".lower():
+            recommendations = [
+                {
+                    "rank": rank,
+                    "company": company,
+                    "policy": policy,
+                    "suitability_reason": "Simulated recommendation",
+                    "key_benefits": ["Cashless hospitalization", "No claim bonus"],
+                    "limitations": ["Waiting period applies"],
+                }
+                for rank, (company, policy) in enumerate(self.catalog[:3], start=1)
+            ]
+            text = json.dumps({"recommendations": recommendations})
+        else:
+            text = "## Simulated answer\n\n- Point one\n- Point two"
+        usage = SimpleNamespace(
+            prompt_token_count=len(self.system_instruction + prompt) // 4,
+            candidates_token_count=len(text) // 4,
+        )
+        return SimpleNamespace(text=text, usage_metadata=usage)
+
+
+# Function to run app.py in this process with the website and Gemini stand-ins patched in
+def serve_app(port, site_url, gemini_latency):
+    from streamlit.web import bootstrap
+
+    real_get = requests.get
+
+    def local_get(url, *args, **kwargs):
+        parts = urlsplit(url)
+        local_url = f"{site_url}{parts.path or '/'}"
+        if parts.query:
+            local_url += f"?{parts.query}"
+        return real_get(local_url, *args, **kwargs)
+
+    with open(os.path.join(APP_DIR, "insurance_database.yml"), "r", encoding="utf-8") as file:
+        database = yaml.safe_load(file) or []
+    StandInGeminiModel.catalog = [
+        (company["name"], policy["name"]) for company in database for policy in company.get("policies", [])
+    ]
+    StandInGeminiModel.latency = gemini_latency
+
+    mock.patch("streamlit.secrets", {"gemini": {"api_key": "load-test"}}).start()
+    mock.patch("requests.get", local_get).start()
+    mock.patch("google.generativeai.GenerativeModel", StandInGeminiModel).start()
+    mock.patch("google.generativeai.configure", lambda *args, **kwargs: None).start()
+
+    # The app loads insurance_database.yml relative to the working directory
+    os.chdir(APP_DIR)
+    flag_options = {
+        "server.port": port,
+        "server.address": "127.0.0.1",
+        "server.headless": True,
+        "server.fileWatcherType": "none",
+        "server.runOnSave": False,
+        "browser.gatherUsageStats": False,
+        "global.developmentMode": False,
+    }
+    bootstrap.load_config_options(flag_options=flag_options)
+    bootstrap.run(APP_PATH, False, [], flag_options)
+
+
+# One simulated browser tab talking to the Streamlit server over its websocket
+class SimulatedUser:
+    def __init__(self, stream_url, user_id, timeout, think_time):
+        self.stream_url = stream_url
+        self.user_id = user_id
+        self.timeout = timeout
+        self.think_time = think_time
+        self.rng = random.Random(user_id)
+        self.websocket = None
+        self.page_script_hash = ""
+        self.widgets = {}
+        self.values = {}
+        self.results = []
+
+    async def connect(self):
+        self.websocket = await websockets.connect(self.stream_url, max_size=None, subprotocols=["streamlit"])
+
+    async def close(self):
+        if self.websocket is not None:
+            await self.websocket.close()
+
+    def set_value(self, label, field, value):
+        self.values[label] = (field, value)
+
+    def options(self, label):
+        return list(self.widgets[label].options)
+
+    def _widget_state(self, label, field, value):
+        state = WidgetState(id=self.widgets[label].id)
+        if field == "string_array_value":
+            state.string_array_value.data.extend(value)
+        elif field == "chat_input_value":
+            state.chat_input_value.data = value
+        else:
+            setattr(state, field, value)
+        return state
+
+    # Send one rerun with the current widget values plus any one-shot triggers, wait for it to finish
+    async def rerun(self, triggers=None):
+        missing = [label for label in triggers or {} if label not in self.widgets]
+        if missing:
+            raise LookupError(f"Widget not rendered: {missing[0]}")
+
+        message = BackMsg()
+        rerun = message.rerun_script
+        rerun.page_script_hash = self.page_script_hash
+        for label, (field, value) in {**self.values, **(triggers or {})}.items():
+            if label in self.widgets:
+                rerun.widget_states.widgets.append(self._widget_state(label, field, value))
+        await self.websocket.send(message.SerializeToString())
+
+        widgets, errors = {}, []
+        while True:
+            raw = await asyncio.wait_for(self.websocket.recv(), self.timeout)
+            forward_msg = ForwardMsg()
+            forward_msg.ParseFromString(raw)
+            kind = forward_msg.WhichOneof("type")
+
+            if kind == "new_session":
+                self.page_script_hash = forward_msg.new_session.page_script_hash
+            elif kind == "delta" and forward_msg.delta.WhichOneof("type") == "new_element":
+                element = forward_msg.delta.new_element
+                element_type = element.WhichOneof("type")
+                proto = getattr(element, element_type)
+                if element_type == "exception":
+                    errors.append(f"{proto.type}: {proto.message}")
+                elif element_type == "alert" and proto.format == Alert.ERROR:
+                    # The app catches its own exceptions and reports them with st.error
+                    errors.append(proto.body)
+                elif element_type == "chat_input":
+                    widgets["chat_input"] = proto
+                elif getattr(proto, "id", "") and getattr(proto, "label", ""):
+                    widgets[proto.label] = proto
+            elif kind == "script_finished":
+                if forward_msg.script_finished == ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    continue
+                break
+
+        self.widgets = widgets
+        if errors:
+            raise RuntimeError(errors[0])
+
+    async def step(self, name, action):
+        start = time.perf_counter()
+        error = None
+        try:
+            await action()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        self.results.append({
+            "user": self.user_id,
+            "step": name,
+            "latency": time.perf_counter() - start,
+            "error": error,
+        })
+        await asyncio.sleep(self.rng.uniform(0, self.think_time))
+
+    async def submit_profile(self):
+        self.set_value(AGE_INPUT, "double_value", self.rng.randint(18, 70))
+        self.set_value(FAMILY_SIZE_INPUT, "double_value", self.rng.randint(1, 5))
+        await self.rerun({PROFILE_BUTTON: ("trigger_value", True)})
+
+    async def browse_policies(self):
+        self.set_value(COMPANY_FILTER, "string_array_value", self.rng.sample(self.options(COMPANY_FILTER), 2))
+        await self.rerun()
+
+    async def compare_policies(self):
+        self.set_value(COMPARE_SELECT, "string_array_value", self.rng.sample(self.options(COMPARE_SELECT), 2))
+        await self.rerun()
+        await self.rerun({COMPARE_BUTTON: ("trigger_value", True)})
+
+    async def chat(self):
+        await self.rerun({"chat_input": ("chat_input_value", self.rng.choice(CHAT_QUESTIONS))})
+
+    async def run(self, iterations):
+        await self.step("initial_load", self._initial_load)
+        for _ in range(iterations):
+            await self.step("submit_profile", self.submit_profile)
+            await self.step("browse_policies", self.browse_policies)
+            await self.step("compare_policies", self.compare_policies)
+            await self.step("chat", self.chat)
+
+    async def _initial_load(self):
+        await self.connect()
+        await self.rerun()
+
+
+# Function to run one full session before measuring, so one-time imports and caches
+# in the server are not counted as per-session cost
+async def warm_up(stream_url, args):
+    user = SimulatedUser(stream_url, -1, args.timeout, think_time=0)
+    try:
+        await user.run(iterations=1)
+    finally:
+        await user.close()
+    return [result["error"] for result in user.results if result["error"]]
+
+
+async def run_users(stream_url, args):
+    users = [SimulatedUser(stream_url, user_id, args.timeout, args.think_time) for user_id in range(args.users)]
+
+    async def start(user, delay):
+        await asyncio.sleep(delay)
+        await user.run(args.iterations)
+
+    try:
+        await asyncio.gather(*[
+            start(user, user.user_id * args.ramp_up / args.users) for user in users
+        ])
+        # Measure while every session is still connected so its state counts
+        memory_mb = read_process_stats(args.server_pid)["memory_mb"]
+    finally:
+        await asyncio.gather(*[user.close() for user in users], return_exceptions=True)
+
+    return [result for user in users for result in user.results], memory_mb
+
+
+# Function to read thread count and resident memory of a process from /proc
+def read_process_stats(pid):
+    stats = {"threads": None, "memory_mb": None}
+    try:
+        with open(f"/proc/{pid}/status", "r") as file:
+            for line in file:
+                if line.startswith("Threads:"):
+                    stats["threads"] = int(line.split()[1])
+                elif line.startswith("VmRSS:"):
+                    stats["memory_mb"] = round(int(line.split()[1]) / 1024, 2)
+    except OSError:
+        pass
+    return stats
+
+
+# Function to sample the server's thread count and memory while the test runs
+def sample_resources(pid, samples, stop_event, interval, started_at):
+    while not stop_event.is_set():
+        samples.append({"elapsed": round(time.perf_counter() - started_at, 2), **read_process_stats(pid)})
+        stop_event.wait(interval)
+
+
+def _percentiles(latencies):
+    if not latencies.size:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    return {
+        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 1),
+        "p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 1),
+        "p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 1),
+        "max_ms": round(float(latencies.max()) * 1000, 1),
+    }
+
+
+def summarize(results, samples, users, duration, baseline_memory, final_memory):
+    latencies = np.array([r["latency"] for r in results], dtype=float)
+    errors = [r for r in results if r["error"]]
+
+    steps = {}
+    for name in dict.fromkeys(r["step"] for r in results):
+        step_latencies = np.array([r["latency"] for r in results if r["step"] == name], dtype=float)
+        steps[name] = {"count": int(step_latencies.size), **_percentiles(step_latencies)}
+
+    memory_per_session = None
+    if baseline_memory is not None and final_memory is not None:
+        memory_per_session = round((final_memory - baseline_memory) / users, 2)
+
+    thread_counts = [s["threads"] for s in samples if s["threads"] is not None]
+    return {
+        "users": users,
+        "duration_s": round(duration, 2),
+        "requests": int(latencies.size),
+        "errors": len(errors),
+        "sample_errors": sorted({e["error"] for e in errors})[:5],
+        "throughput_rps": round(latencies.size / duration, 2) if duration else 0.0,
+        **_percentiles(latencies),
+        "memory_baseline_mb": baseline_memory,
+        "memory_final_mb": final_memory,
+        "memory_per_session_mb": memory_per_session,
+        "threads_start": thread_counts[0] if thread_counts else None,
+        "threads_peak": max(thread_counts) if thread_counts else None,
+        "threads_end": thread_counts[-1] if thread_counts else None,
+        "steps": steps,
+        "timeline": samples,
+    }
+
+
+def print_report(report):
+    print(f"Users: {report['users']}  Duration: {report['duration_s']}s  Steps: {report['requests']}  "
+          f"Errors: {report['errors']}")
+    print(f"Throughput: {report['throughput_rps']} steps/s  "
+          f"p50: {report['p50_ms']} ms  p95: {report['p95_ms']} ms  p99: {report['p99_ms']} ms")
+    print(f"Server memory: {report['memory_baseline_mb']} MB after warm-up, {report['memory_final_mb']} MB loaded, "
+          f"{report['memory_per_session_mb']} MB per session")
+    print(f"Server threads: start {report['threads_start']}, peak {report['threads_peak']}, "
+          f"end {report['threads_end']}")
+    for error in report["sample_errors"]:
+        print(f"  error: {error}")
+
+    print("\nPer step:")
+    for name, stats in report["steps"].items():
+        print(f"  {name:<18} n={stats['count']:<5} p50={stats['p50_ms']:>8} ms  p95={stats['p95_ms']:>8} ms  "
+              f"p99={stats['p99_ms']:>8} ms  max={stats['max_ms']:>8} ms")
+
+    print("\nServer threads / memory over time:")
+    timeline = report["timeline"]
+    stride = max(len(timeline) // 20, 1)
+    for sample in timeline[::stride]:
+        print(f"  t={sample['elapsed']:>7}s  threads={sample['threads']}  memory={sample['memory_mb']} MB")
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_healthy(base_url, server, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("Streamlit server exited during startup, rerun with --server-log to see why")
+        try:
+            if requests.get(f"{base_url}/_stcore/health", timeout=1).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"Streamlit server did not become healthy within {timeout}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent advisor sessions against app.py")
+    parser.add_argument("--users", type=int, default=10, help="Number of concurrent simulated users")
+    parser.add_argument("--iterations", type=int, default=2, help="Flow repetitions per user")
+    parser.add_argument("--ramp-up", type=float, default=2.0, help="Seconds over which users are started")
+    parser.add_argument("--think-time", type=float, default=0.2, help="Max random pause between steps (s)")
+    parser.add_argument("--gemini-latency", type=float, default=0.5, help="Simulated Gemini response time (s)")
+    parser.add_argument("--site-latency", type=float, default=0.05, help="Simulated website response time (s)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Max wait for a single rerun (s)")
+    parser.add_argument("--sample-interval", type=float, default=0.5, help="Resource sampling interval (s)")
+    parser.add_argument("--json", dest="json_path", help="Also write the full report to this JSON file")
+    parser.add_argument("--server-log", help="Write the Streamlit server's output to this file")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--site-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve_app(args.port, args.site_url, args.gemini_latency)
+        return
+
+    StandInSiteHandler.latency = args.site_latency
+    sites = ThreadingHTTPServer(("127.0.0.1", 0), StandInSiteHandler)
+    threading.Thread(target=sites.serve_forever, daemon=True).start()
+    site_url = f"http://127.0.0.1:{sites.server_address[1]}"
+
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    log = open(args.server_log, "w") if args.server_log else subprocess.DEVNULL
+    server = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--serve", "--port", str(port), "--site-url", site_url,
+         "--gemini-latency", str(args.gemini_latency)],
+        stdout=log,
+        stderr=subprocess.STDOUT,
+    )
+    args.server_pid = server.pid
+
+    samples = []
+    stop_event = threading.Event()
+    try:
+        _wait_until_healthy(base_url, server, timeout=60)
+        stream_url = f"ws://127.0.0.1:{port}/_stcore/stream"
+
+        warm_up_errors = asyncio.run(warm_up(stream_url, args))
+        if warm_up_errors:
+            print(f"Warm-up session reported errors: {warm_up_errors[0]}")
+        baseline_memory = read_process_stats(server.pid)["memory_mb"]
+
+        started_at = time.perf_counter()
+        sampler = threading.Thread(
+            target=sample_resources, args=(server.pid, samples, stop_event, args.sample_interval, started_at),
+            daemon=True,
+        )
+        sampler.start()
+
+        results, final_memory = asyncio.run(run_users(stream_url, args))
+        duration = time.perf_counter() - started_at
+
+        stop_event.set()
+        sampler.join()
+    finally:
+        stop_event.set()
+        server.terminate()
+        server.wait(timeout=10)
+        sites.shutdown()
+        if log is not subprocess.DEVNULL:
+            log.close()
+
+    report = summarize(results, samples, args.users, duration, baseline_memory, final_memory)
+    print_report(report)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import re
+import numpy as np
+import pandas as pd
+
+# Multipliers for the Indian number units used in the catalog ("₹5 Lakhs", "₹1 Crore")
+AMOUNT_UNITS = {
+    "k": 1_000,
+    "thousand": 1_000,
+    "l": 100_000,
+    "lac": 100_000,
+    "lacs": 100_000,
+    "lakh": 100_000,
+    "lakhs": 100_000,
+    "cr": 10_000_000,
+    "crore": 10_000_000,
+    "crores": 10_000_000,
+}
+
+# Number of payments per year for each premium period found in range strings
+PERIODS_PER_YEAR = {
+    "half-yearly": 2,
+    "annually": 1,
+    "annual": 1,
+    "yearly": 1,
+    "year": 1,
+    "annum": 1,
+    "quarterly": 4,
+    "monthly": 12,
+    "month": 12,
+}
+
+# Loading factors applied on top of the coverage-interpolated base premium. The loaded
+# premium is not clipped; it is flagged when it falls outside the policy's published range.
+# Override any of these by passing a dict with the same keys to estimate_premiums.
+DEFAULT_LOADING_FACTORS = {
+    # (minimum age, multiplier) - the last band whose minimum age is <= the user's age applies
+    "age_bands": [(0, 0.85), (18, 1.0), (36, 1.25), (46, 1.6), (56, 2.1), (61, 2.8), (71, 3.5)],
+    # Each additional family member on a floater adds this fraction of the single-person premium
+    "family_member": 0.55,
+    # Loading per declared pre-existing condition
+    "conditions": {
+        "Diabetes": 0.20,
+        "Hypertension": 0.15,
+        "Heart Disease": 0.35,
+        "Asthma": 0.10,
+        "Thyroid": 0.05,
+        "Cancer": 0.50,
+        "Other": 0.10,
+    },
+    # Cap on the combined pre-existing condition loading
+    "max_condition_loading": 1.0,
+}
+
+_AMOUNT_PATTERN = re.compile(r"([\d][\d,]*(?:\.\d+)?)\s*([a-zA-Z]+)?")
+
+
+# Function to parse a single rupee amount such as "₹8,000", "₹1.5 Lakhs" or "₹1 Crore"
+def parse_amount(text):
+    """Return the amount in rupees as a float, or NaN if no amount is found."""
+    if text is None:
+        return np.nan
+    match = _AMOUNT_PATTERN.search(str(text))
+    if not match:
+        return np.nan
+    value = float(match.group(1).replace(",", ""))
+    unit = (match.group(2) or "").lower()
+    return value * AMOUNT_UNITS.get(unit, 1)
+
+
+# Function to parse a range such as "₹8,000 - ₹53,000 annually" into annual (low, high) amounts
+def parse_amount_range(text, annualize=True):
+    """Return (low, high) in rupees; premium ranges are normalized to annual amounts."""
+    if text is None:
+        return np.nan, np.nan
+    text = str(text)
+    parts = re.split(r"\s*[-–]\s*(?=[₹\d])|\s+to\s+", text, maxsplit=1)
+    low = parse_amount(parts[0])
+    if len(parts) > 1:
+        high = parse_amount(parts[1])
+    elif len(_AMOUNT_PATTERN.findall(text)) > 1:
+        # Two amounts with a separator we do not recognise; fail instead of guessing the upper bound
+        high = np.nan
+    else:
+        high = low
+
+    if annualize:
+        lowered = text.lower()
+        periods = next((n for period, n in PERIODS_PER_YEAR.items() if period in lowered), 1)
+        low, high = low * periods, high * periods
+
+    return low, high
+
+
+# Function to turn the nested insurance database into one row of parsed numbers per policy
+def build_premium_table(insurance_database):
+    """Flatten the catalog into a DataFrame of annual premium and coverage bounds."""
+    rows = []
+    for company in insurance_database or []:
+        for policy in company.get("policies", []):
+            premium_min, premium_max = parse_amount_range(policy.get("premium_range"))
+            coverage_min, coverage_max = parse_amount_range(policy.get("coverage_range"), annualize=False)
+            rows.append({
+                "company": company["name"],
+                "policy": policy["name"],
+                "premium_min": premium_min,
+                "premium_max": premium_max,
+                "coverage_min": coverage_min,
+                "coverage_max": coverage_max,
+            })
+
+    return pd.DataFrame(rows, columns=["company", "policy", "premium_min", "premium_max",
+                                       "coverage_min", "coverage_max"])
+
+
+def _age_factor(age, age_bands):
+    thresholds = np.array([band[0] for band in age_bands], dtype=float)
+    multipliers = np.array([band[1] for band in age_bands], dtype=float)
+    index = np.searchsorted(thresholds, float(age or 30), side="right") - 1
+    return multipliers[max(index, 0)]
+
+
+def _condition_factor(conditions, condition_loadings, max_loading):
+    loading = sum(condition_loadings.get(c, 0.0) for c in conditions or [] if c != "None")
+    return 1.0 + min(loading, max_loading)
+
+
+# Function to estimate premiums for every policy in the premium table at once
+def estimate_premiums(premium_table, user_profile, loading_factors=None):
+    """Return premium_table with annual/monthly estimates for the given user profile.
+
+    The base premium is interpolated between the catalog's minimum and maximum premium
+    according to where the requested coverage sits (on a log scale) within each policy's
+    coverage range, then scaled by age, family size and pre-existing condition loadings.
+    The result is not clipped, so the coverage tier keeps its effect for loaded profiles;
+    within_premium_range is False for policies where it falls outside the published range.
+    """
+    factors = dict(DEFAULT_LOADING_FACTORS)
+    if loading_factors:
+        factors.update(loading_factors)
+
+    table = premium_table.copy()
+    if table.empty:
+        for column in ["coverage_available", "within_premium_range", "annual_estimate", "monthly_estimate",
+                       "within_budget"]:
+            table[column] = pd.Series(dtype=float)
+        return table
+
+    premium_min = table["premium_min"].to_numpy(dtype=float)
+    premium_max = table["premium_max"].to_numpy(dtype=float)
+    coverage_min = table["coverage_min"].to_numpy(dtype=float)
+    coverage_max = table["coverage_max"].to_numpy(dtype=float)
+
+    coverage = parse_amount(user_profile.get("coverage_amount"))
+    if np.isnan(coverage):
+        coverage = coverage_min
+
+    # Position of the requested coverage inside each policy's range, 0 at the minimum, 1 at the maximum
+    with np.errstate(divide="ignore", invalid="ignore"):
+        span = np.log(coverage_max) - np.log(coverage_min)
+        position = np.where(span > 0, (np.log(coverage) - np.log(coverage_min)) / span, 0.0)
+    position = np.clip(np.nan_to_num(position), 0.0, 1.0)
+
+    base = premium_min + position * (premium_max - premium_min)
+
+    family_size = max(int(user_profile.get("family_size") or 1), 1)
+    multiplier = (
+        _age_factor(user_profile.get("age"), factors["age_bands"])
+        * (1.0 + factors["family_member"] * (family_size - 1))
+        * _condition_factor(user_profile.get("pre_existing_conditions"), factors["conditions"],
+                            factors["max_condition_loading"])
+    )
+
+    annual = np.round(base * multiplier, -2)
+    table["coverage_available"] = (coverage >= coverage_min) & (coverage <= coverage_max)
+    table["within_premium_range"] = (annual >= premium_min) & (annual <= premium_max)
+    table["annual_estimate"] = annual
+    table["monthly_estimate"] = np.round(annual / 12)
+
+    budget = user_profile.get("budget")
+    table["within_budget"] = table["monthly_estimate"] <= budget if budget else True
+
+    return table
+
+
+# Function to look up the estimate for a single company/policy pair
+def lookup_estimate(estimates, company, policy):
+    """Return the matching estimate row as a dict, or None if the policy is not in the table."""
+    match = estimates[(estimates["company"] == company) & (estimates["policy"] == policy)]
+    if match.empty:
+        return None
+    return match.iloc[0].to_dict()
+
+
+# Function to format an estimate row for display
+def format_premium_estimate(estimate):
+    """Return a human-readable premium estimate such as "₹12,300/year (≈ ₹1,025/month)"."""
+    if not estimate or pd.isna(estimate.get("annual_estimate")):
+        return "Premium estimate not available"
+    text = f"₹{estimate['annual_estimate']:,.0f}/year (≈ ₹{estimate['monthly_estimate']:,.0f}/month)"
+    if not estimate.get("coverage_available", True):
+        text += " - requested coverage is outside this policy's range"
+    if not estimate.get("within_premium_range", True):
+        text += " - your profile is likely priced outside the published premium range"
+    return text
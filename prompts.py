@@ -0,0 +1,177 @@
+import math
+
+# Rough characters-per-token ratio for Gemini on English/tabular text, used to count
+# tokens locally before a call instead of paying a count_tokens round trip
+CHARS_PER_TOKEN = 4
+
+# Per-call prompt budgets (user prompt only, system prompts are fixed and small)
+RECOMMENDATION_TOKEN_BUDGET = 2500
+COMPARISON_TOKEN_BUDGET = 1500
+
+# Preferred order of table columns; any other catalog field is appended after these
+POLICY_COLUMNS = [
+    "company", "policy", "coverage_range", "premium_range", "pre_existing_waiting_period",
+    "co_payment", "return_of_premium", "maternity_coverage", "special_features", "suitable_for",
+    "claim_settlement_ratio", "cashless_hospitals", "starting_premium", "live_premium",
+    "live_premium_updated",
+]
+
+# Local premium estimate fields appended to recommendation and comparison rows
+ESTIMATE_COLUMNS = ["est_annual", "est_monthly", "within_budget"]
+
+# Free-text columns dropped, in this order, when a comparison is over its token budget
+COMPARISON_TRIM_COLUMNS = ["suitable_for", "special_features", "live_premium_updated"]
+
+RECOMMENDATION_SYSTEM_PROMPT = """You are a health insurance advisor for India.
+You receive a user profile and the available policies as a pipe-separated table whose first line is the header.
+est_annual and est_monthly are premium estimates already computed for this user in rupees; do not recompute them.
+
+Recommend the top 3 most suitable insurance policies for this user, respecting the monthly budget.
+Use company and policy names exactly as they appear in the table.
+Respond only with JSON in this format:
+{"recommendations": [{"rank": 1, "company": "Company name", "policy": "Policy name", "suitability_reason": "Why this is suitable", "key_benefits": ["benefit1", "benefit2", "benefit3"], "limitations": ["limitation1", "limitation2"]}]}"""
+
+COMPARISON_SYSTEM_PROMPT = """You compare Indian health insurance policies objectively.
+Policies are given as a pipe-separated table whose first line is the header.
+est_annual and est_monthly, when present, are premium estimates already computed for this user in rupees; base the premium comparison on them and do not recompute them.
+Provide a detailed comparison including:
+1. Premium cost comparison
+2. Coverage benefits comparison
+3. Waiting periods comparison
+4. Special features comparison
+5. Pros and cons of each policy
+6. Which policy might be better for different types of users
+Format your response in a clear, structured way with headings and bullet points."""
+
+QUESTION_SYSTEM_PROMPT = """You are a health insurance expert for India.
+Provide detailed, accurate, and helpful answers based on your knowledge of health insurance in India.
+Include relevant facts, regulations, and practical advice where appropriate."""
+
+
+# Function to estimate the number of tokens in a piece of text
+def estimate_tokens(text):
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+# Function to flatten the nested catalog into one row per policy with its company's fields
+def flatten_catalog(insurance_database):
+    rows = []
+    for company in insurance_database or []:
+        company_fields = {key: value for key, value in company.items() if key not in ("name", "policies")}
+        for policy in company.get("policies", []):
+            row = {"company": company["name"], "policy": policy["name"], **company_fields}
+            row.update({key: value for key, value in policy.items() if key != "name"})
+            rows.append(row)
+    return rows
+
+
+def _cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        value = ", ".join(str(item) for item in value)
+    return str(value).replace("|", "/").replace("\n", " ").strip()
+
+
+# Function to order table columns: preferred columns first, then any other fields in first-seen order
+def table_columns(rows, preferred):
+    columns = list(preferred)
+    for row in rows:
+        columns.extend(key for key in row if key not in columns and not key.startswith("_"))
+    return columns
+
+
+# Function to serialize rows as a compact pipe-separated table with a single shared header
+def serialize_table(rows, columns):
+    """Return the header line and one line per row; columns that are empty in every row are dropped."""
+    columns = [column for column in columns if any(_cell(row.get(column)) for row in rows)]
+    header = "|".join(columns)
+    lines = ["|".join(_cell(row.get(column)) for column in columns) for row in rows]
+    return header, lines
+
+
+# Function to append table rows to a prompt prefix, dropping rows over budget
+def fit_table_to_budget(prefix, header, lines, max_tokens, min_rows=1, drop_order=None):
+    """Return (prompt, estimated_tokens, dropped_rows); kept rows stay in their original order.
+
+    drop_order lists line indices from first to last to drop, by default the last line first.
+    """
+    drop_order = list(reversed(range(len(lines)))) if drop_order is None else list(drop_order)
+    dropped = set()
+    total_chars = len(prefix) + len(header) + sum(len(line) + 1 for line in lines)
+    for index in drop_order:
+        if len(lines) - len(dropped) <= min_rows or math.ceil(total_chars / CHARS_PER_TOKEN) <= max_tokens:
+            break
+        dropped.add(index)
+        total_chars -= len(lines[index]) + 1
+
+    kept = [line for index, line in enumerate(lines) if index not in dropped]
+    prompt = prefix + "\n".join([header] + kept)
+    return prompt, estimate_tokens(prompt), len(dropped)
+
+
+# Function to index premium estimates by (company, policy)
+def _estimates_by_policy(estimates):
+    if estimates is None:
+        return {}
+    return {(row.company, row.policy): row for row in estimates.itertuples(index=False)}
+
+
+# Function to add the local premium estimate columns to a policy row
+def _add_estimate(row, by_policy):
+    """Return the estimate used for the row, or None if the policy has no usable estimate."""
+    estimate = by_policy.get((row["company"], row["policy"]))
+    if estimate is None or math.isnan(estimate.annual_estimate):
+        return None
+    row["est_annual"] = f"{estimate.annual_estimate:.0f}"
+    row["est_monthly"] = f"{estimate.monthly_estimate:.0f}"
+    row["within_budget"] = "yes" if estimate.within_budget else "no"
+    return estimate
+
+
+# Function to build the user prompt for personalized recommendations
+def build_recommendation_prompt(user_profile, insurance_database, estimates, max_tokens=RECOMMENDATION_TOKEN_BUDGET):
+    """Return (prompt, estimated_tokens, dropped_rows) for the recommendation call.
+
+    Policies stay in catalog order. When over the token budget, the ones that fit the monthly
+    budget and requested coverage worst (then the most expensive) are dropped first.
+    """
+    by_policy = _estimates_by_policy(estimates)
+    rows = []
+    for row in flatten_catalog(insurance_database):
+        estimate = _add_estimate(row, by_policy)
+        if estimate is not None:
+            row["_rank"] = (not estimate.within_budget, not estimate.coverage_available, estimate.annual_estimate)
+        else:
+            row["_rank"] = (True, True, float("inf"))
+        rows.append(row)
+    drop_order = sorted(range(len(rows)), key=lambda index: rows[index]["_rank"], reverse=True)
+
+    profile_str = "\n".join([f"{k}: {v}" for k, v in user_profile.items() if v])
+    prefix = f"USER PROFILE:\n{profile_str}\n\nAVAILABLE POLICIES:\n"
+    header, lines = serialize_table(rows, table_columns(rows, POLICY_COLUMNS + ESTIMATE_COLUMNS))
+    return fit_table_to_budget(prefix, header, lines, max_tokens, min_rows=3, drop_order=drop_order)
+
+
+# Function to build the user prompt for comparing selected policies
+def build_comparison_prompt(policy_rows, estimates=None, max_tokens=COMPARISON_TOKEN_BUDGET):
+    """Return (prompt, estimated_tokens, dropped_columns) for the comparison call.
+
+    Every selected policy is kept; when over budget, free-text columns are dropped instead.
+    When estimates are given, each row carries the same local premium estimate shown in the UI.
+    """
+    by_policy = _estimates_by_policy(estimates)
+    policy_rows = [dict(row) for row in policy_rows]
+    for row in policy_rows:
+        _add_estimate(row, by_policy)
+    columns = table_columns(policy_rows, POLICY_COLUMNS + ESTIMATE_COLUMNS)
+    dropped_columns = []
+    while True:
+        header, lines = serialize_table(policy_rows, columns)
+        prompt = "Compare these policies:\n" + "\n".join([header] + lines)
+        prompt_tokens = estimate_tokens(prompt)
+        trimmable = [column for column in COMPARISON_TRIM_COLUMNS if column in columns]
+        if prompt_tokens <= max_tokens or not trimmable:
+            return prompt, prompt_tokens, dropped_columns
+        columns.remove(trimmable[0])
+        dropped_columns.append(trimmable[0])
@@ -0,0 +1,94 @@
+import pytest
+
+from insurers import (
+    build_insurer_index, merge_live_data, normalize_insurer_name, normalize_policy_name, resolve_insurer
+)
+
+CATALOG_NAMES = [
+    "SBI General Insurance", "CARE Health Insurance", "Star Health", "Bajaj Allianz", "Tata AIG",
+    "HDFC ERGO", "Max Bupa Health Insurance", "Religare Health Insurance",
+    "Aditya Birla Health Insurance", "ICICI Lombard",
+]
+
+INDEX = build_insurer_index(CATALOG_NAMES)
+
+
+def test_normalize_insurer_name():
+    assert normalize_insurer_name("CARE Health Insurance") == "care"
+    assert normalize_insurer_name("HDFC ERGO General Insurance Co. Ltd.") == "hdfc ergo"
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("Care", "CARE Health Insurance"),
+    ("Care Health Insurance Ltd.", "CARE Health Insurance"),
+    ("Religare", "Religare Health Insurance"),
+    ("Star Health and Allied Insurance", "Star Health"),
+    ("Niva Bupa Health Insurance", "Max Bupa Health Insurance"),
+    ("HDFC", "HDFC ERGO"),
+    ("Tata AIG General Insurance", "Tata AIG"),
+])
+def test_resolves_source_spellings(name, expected):
+    assert resolve_insurer(INDEX, name) == expected
+
+
+@pytest.mark.parametrize("name", [
+    "Tata AIA Life",
+    "Max Life Insurance",
+    "HDFC Life",
+    "SBI Life",
+    "Star Union Dai-ichi Life",
+    "Bajaj Allianz Life",
+    "Go Digit General Insurance",
+    "Health Insurance",
+])
+def test_rejects_other_insurers(name):
+    assert resolve_insurer(INDEX, name) is None
+
+
+def test_merge_live_data_joins_on_resolved_insurer():
+    catalog = [
+        {"name": "CARE Health Insurance", "claim_settlement_ratio": "95.2%",
+         "policies": [{"name": "Care"}]},
+        {"name": "Religare Health Insurance", "claim_settlement_ratio": "93.8%",
+         "policies": [{"name": "Care"}]},
+    ]
+    index = build_insurer_index([company["name"] for company in catalog])
+    merged = merge_live_data(
+        catalog, index,
+        claim_data=[{"company": "Care Health Insurance Ltd.", "claim_settlement_ratio": "99%"},
+                    {"company": "Religare Life", "claim_settlement_ratio": "50%"}],
+        premium_data=[{"company": "Care Health", "policy_name": "Care", "premium": "₹9,000",
+                       "last_updated": "2026-10-19"}],
+    )
+
+    assert merged[0]["claim_settlement_ratio"] == "99%"
+    assert merged[0]["policies"][0]["live_premium"] == "₹9,000"
+    assert merged[1]["claim_settlement_ratio"] == "93.8%"
+    assert "live_premium" not in merged[1]["policies"][0]
+    assert catalog[0]["claim_settlement_ratio"] == "95.2%"
+
+
+def test_normalize_policy_name_keeps_generic_words():
+    assert normalize_policy_name("Optima Secure (Plan A)") == "optima secure plan a"
+    assert normalize_policy_name("Care Health") != normalize_policy_name("Care")
+
+
+def test_merge_live_data_joins_policies_by_full_name():
+    catalog = [{
+        "name": "HDFC ERGO",
+        "policies": [{"name": "Optima Secure"}, {"name": "Optima Secure Plan"},
+                     {"name": "my:health Suraksha"}],
+    }]
+    index = build_insurer_index(["HDFC ERGO"])
+    merged = merge_live_data(
+        catalog, index,
+        premium_data=[{"company": "HDFC ERGO General Insurance", "policy_name": "OPTIMA SECURE PLAN",
+                       "premium": "₹15,000"},
+                      {"company": "HDFC ERGO", "policy_name": "My Health Suraksha", "premium": "₹11,000"},
+                      {"company": "HDFC ERGO", "policy_name": "Optima Restore", "premium": "₹9,000"}],
+    )
+
+    policies = merged[0]["policies"]
+    assert "live_premium" not in policies[0]
+    assert policies[1]["live_premium"] == "₹15,000"
+    assert policies[2]["live_premium"] == "₹11,000"
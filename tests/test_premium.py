@@ -0,0 +1,97 @@
+import math
+
+from premium import (
+    build_premium_table, estimate_premiums, lookup_estimate, parse_amount, parse_amount_range
+)
+
+CATALOG = [
+    {
+        "name": "SBI General Insurance",
+        "policies": [{
+            "name": "Arogya Premier",
+            "coverage_range": "₹5 Lakhs to ₹1 Crore",
+            "premium_range": "₹8,000 - ₹50,000 annually",
+        }],
+    },
+    {
+        "name": "Bajaj Allianz",
+        "policies": [{
+            "name": "Health Guard",
+            "coverage_range": "₹1.5 Lakhs to ₹1 Crore",
+            "premium_range": "₹700 - ₹4,000 monthly",
+        }],
+    },
+]
+
+PROFILE = {
+    "age": 30,
+    "family_size": 1,
+    "pre_existing_conditions": ["None"],
+    "budget": 5000,
+    "coverage_amount": "₹10 Lakhs",
+}
+
+
+def test_parse_amount_units():
+    assert parse_amount("₹8,000") == 8000
+    assert parse_amount("₹1.5 Lakhs") == 150_000
+    assert parse_amount("₹1 Crore") == 10_000_000
+    assert math.isnan(parse_amount("Not specified"))
+
+
+def test_parse_amount_range_annualizes_premiums():
+    assert parse_amount_range("₹8,000 - ₹53,000 annually") == (8000, 53000)
+    assert parse_amount_range("₹700 - ₹4,000 monthly") == (8400, 48000)
+    assert parse_amount_range("₹5 Lakhs to ₹1 Crore", annualize=False) == (500_000, 10_000_000)
+
+
+def test_parse_amount_range_separators():
+    assert parse_amount_range("₹8,000-₹53,000") == (8000, 53000)
+    assert parse_amount_range("₹10k–₹20k per year") == (10000, 20000)
+    assert parse_amount_range("₹5,000 half-yearly") == (10000, 10000)
+    low, high = parse_amount_range("₹5,000 / ₹9,000 annually")
+    assert low == 5000 and math.isnan(high)
+
+
+def test_loadings_raise_estimate():
+    table = build_premium_table(CATALOG)
+    base = lookup_estimate(estimate_premiums(table, PROFILE), "SBI General Insurance", "Arogya Premier")
+    loaded = lookup_estimate(
+        estimate_premiums(table, {**PROFILE, "age": 50, "pre_existing_conditions": ["Diabetes"]}),
+        "SBI General Insurance", "Arogya Premier",
+    )
+    assert 8000 <= base["annual_estimate"] < loaded["annual_estimate"]
+    assert base["monthly_estimate"] == round(base["annual_estimate"] / 12)
+
+
+def test_coverage_tier_changes_loaded_estimate():
+    table = build_premium_table(CATALOG)
+    couple = {**PROFILE, "age": 50, "family_size": 2}
+    annual = [
+        lookup_estimate(estimate_premiums(table, {**couple, "coverage_amount": coverage}),
+                        "SBI General Insurance", "Arogya Premier")["annual_estimate"]
+        for coverage in ["₹10 Lakhs", "₹20 Lakhs", "₹50 Lakhs", "₹1 Crore"]
+    ]
+    assert annual == sorted(set(annual))
+
+
+def test_estimates_outside_published_range_are_flagged():
+    table = build_premium_table(CATALOG)
+    high_risk = {**PROFILE, "age": 50, "family_size": 2, "budget": 5000, "coverage_amount": "₹1 Crore"}
+    minor = {**PROFILE, "age": 10, "coverage_amount": "₹2 Lakhs"}
+
+    high = lookup_estimate(estimate_premiums(table, high_risk), "SBI General Insurance", "Arogya Premier")
+    low = lookup_estimate(estimate_premiums(table, minor), "SBI General Insurance", "Arogya Premier")
+
+    assert high["annual_estimate"] > 50000
+    assert not high["within_premium_range"]
+    assert not high["within_budget"]
+    assert low["annual_estimate"] < 8000
+    assert not low["within_premium_range"]
+    assert not low["coverage_available"]
+
+
+def test_lookup_estimate_matches_company_and_policy():
+    estimates = estimate_premiums(build_premium_table(CATALOG), PROFILE)
+    assert lookup_estimate(estimates, "Bajaj Allianz", "Health Guard")["premium_min"] == 8400
+    assert lookup_estimate(estimates, "Bajaj Allianz", "Arogya Premier") is None
@@ -0,0 +1,78 @@
+from premium import build_premium_table, estimate_premiums
+from prompts import build_comparison_prompt, build_recommendation_prompt, flatten_catalog
+
+CATALOG = [
+    {
+        "name": "Cheap Insurer",
+        "claim_settlement_ratio": "90%",
+        "policies": [{
+            "name": "Basic",
+            "coverage_range": "₹3 Lakhs to ₹1 Crore",
+            "premium_range": "₹5,000 - ₹20,000 annually",
+            "special_features": "Basic cover " * 20,
+            "live_premium": "₹6,000",
+            "live_premium_updated": "2026-10-19",
+        }],
+    },
+    {
+        "name": "Premium Insurer",
+        "claim_settlement_ratio": "98%",
+        "policies": [{
+            "name": "Elite",
+            "coverage_range": "₹10 Lakhs to ₹1 Crore",
+            "premium_range": "₹30,000 - ₹90,000 annually",
+            "special_features": "Global cover " * 20,
+        }],
+    },
+]
+
+PROFILE = {"age": 30, "family_size": 1, "budget": 2000, "coverage_amount": "₹5 Lakhs"}
+
+
+def _recommendation_prompt(max_tokens):
+    estimates = estimate_premiums(build_premium_table(CATALOG), PROFILE)
+    return build_recommendation_prompt(PROFILE, CATALOG, estimates, max_tokens=max_tokens)
+
+
+def test_recommendation_rows_keep_catalog_order():
+    prompt, _, dropped = _recommendation_prompt(max_tokens=10_000)
+    assert dropped == 0
+    assert prompt.index("Cheap Insurer") < prompt.index("Premium Insurer")
+
+
+def test_recommendation_budget_trims_worst_fit_first():
+    prompt, _, dropped = _recommendation_prompt(max_tokens=1)
+    assert dropped == 0  # never fewer than three rows
+
+    catalog = CATALOG + [{**company, "name": company["name"] + " Two"} for company in CATALOG]
+    estimates = estimate_premiums(build_premium_table(catalog), PROFILE)
+    prompt, _, dropped = build_recommendation_prompt(PROFILE, catalog, estimates, max_tokens=1)
+    assert dropped == 1
+    assert "Cheap Insurer|" in prompt and "Cheap Insurer Two|" in prompt
+    assert prompt.count("|Elite|") == 1
+
+
+def test_unlisted_catalog_fields_are_serialized():
+    prompt, _, _ = _recommendation_prompt(max_tokens=10_000)
+    assert "live_premium_updated" in prompt
+    assert "2026-10-19" in prompt
+
+
+def test_comparison_trims_columns_not_policies():
+    rows = flatten_catalog(CATALOG)
+    prompt, _, dropped_columns = build_comparison_prompt(rows, max_tokens=50)
+    assert "Basic" in prompt and "Elite" in prompt
+    assert "special_features" in dropped_columns
+    assert "Global cover" not in prompt
+
+
+def test_comparison_includes_local_estimates():
+    rows = flatten_catalog(CATALOG)
+    estimates = estimate_premiums(build_premium_table(CATALOG), PROFILE)
+    prompt, _, _ = build_comparison_prompt(rows, estimates)
+    header = prompt.splitlines()[1].split("|")
+    assert "est_annual" in header and "est_monthly" in header
+    basic = next(line for line in prompt.splitlines() if line.startswith("Cheap Insurer|"))
+    annual = estimates.loc[estimates["policy"] == "Basic", "annual_estimate"].iloc[0]
+    assert basic.split("|")[header.index("est_annual")] == f"{annual:.0f}"
+    assert "est_annual" not in rows[0]
@@ -1,6 +1,7 @@
 import requests
 from bs4 import BeautifulSoup
 from datetime import datetime
+from insurers import build_insurer_index, resolve_insurer
 
 # Function to fetch latest insurance data from IRDAI
 def fetch_irdai_data():
@@ -146,33 +147,32 @@ def scrape_premium_data():
         return []
 
 
+# Terms and conditions pages of insurance company websites
+COMPANY_WEBSITES = {
+    "HDFC ERGO": "https://www.hdfcergo.com/health-insurance",
+    "Aditya Birla": "https://www.adityabirlacapital.com/health-insurance",
+    "Bajaj Allianz": "https://www.bajajallianz.com/health-insurance.html",
+    "Care": "https://www.careinsurance.com/health-insurance-policies.html",
+    "Niva Bupa": "https://www.nivabupa.com/health-insurance",
+    "Star Health": "https://www.starhealth.in/health-insurance",
+    "ICICI Lombard": "https://www.icicilombard.com/health-insurance",
+    "SBI General": "https://www.sbigeneral.in/health-insurance",
+    "Tata AIG": "https://www.tataaig.com/health-insurance",
+    "Max Bupa": "https://www.maxbupa.com/health-insurance",
+    "Religare": "https://www.religarehealthinsurance.com/health-insurance",
+}
+
+_COMPANY_WEBSITE_INDEX = build_insurer_index(COMPANY_WEBSITES)
+
+
 # Function to fetch terms and conditions from insurance company websites
 def fetch_terms_and_conditions(company_name):
     try:
-        # This is a simplified example - in practice, you'd need to map company names to their websites
-        company_websites = {
-            "HDFC ERGO": "https://www.hdfcergo.com/health-insurance",
-            "Aditya Birla": "https://www.adityabirlacapital.com/health-insurance",
-            "Bajaj Allianz": "https://www.bajajallianz.com/health-insurance.html",
-            "Care": "https://www.careinsurance.com/health-insurance-policies.html",
-            "Niva Bupa": "https://www.nivabupa.com/health-insurance",
-            "Star Health": "https://www.starhealth.in/health-insurance",
-            "ICICI Lombard": "https://www.icicilombard.com/health-insurance",
-            "SBI General": "https://www.sbigeneral.in/health-insurance",
-            "Tata AIG": "https://www.tataaig.com/health-insurance",
-            "Max Bupa": "https://www.maxbupa.com/health-insurance",
-            "Religare": "https://www.religarehealthinsurance.com/health-insurance",
-        }
-
-        # Try to find the best match for company name
-        best_match = None
-        for key in company_websites:
-            if key.lower() in company_name.lower() or company_name.lower() in key.lower():
-                best_match = key
-                break
+        # Resolve the name through the precomputed insurer index instead of substring matching
+        best_match = resolve_insurer(_COMPANY_WEBSITE_INDEX, company_name)
 
         if best_match:
-            url = company_websites[best_match]
+            url = COMPANY_WEBSITES[best_match]
             response = requests.get(url)
 
             if response.status_code == 200: